@@ -253,6 +253,11 @@ def main():
     st.title("💫 42 Spain  | 🎄Advent of Code 2024 Dashboard")
     
     try:
+        # Force a fresh scrape instead of waiting for the cache TTL
+        if st.sidebar.button("📥 Refresh Data"):
+            analytics.log_event('button_click', 'refresh_data')
+            refresh_data()
+
         df = load_data()
 
         init_session_state(df)
@@ -1,157 +1,196 @@
 import pandas as pd
+import numpy as np
 import streamlit as st
-import sys
-import io
-from .scraper import AOCScraper
+from .scraper import AOCScraper, DTYPES
+from .app_utils import CAMPUS_COLORS, get_day_columns
 import logging
 from datetime import datetime
 import os
-import glob
 from typing import Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
-# Define campus color mapping
-CAMPUS_COLORS = {
-    'UDZ': '#00FF00',  # Green
-    'BCN': '#FFD700',  # Yellow
-    'MAL': '#00FFFF',  # Cyan
-    'MAD': '#FF00FF'   # Magenta
-}
+# Backups are written as Parquet; CSV is still read for files saved by older versions
+BACKUP_PREFIX = 'aoc_rankings_'
+BACKUP_EXTENSIONS = ('.parquet', '.csv')
+
+def _is_backup_file(name: str) -> bool:
+    return name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_EXTENSIONS)
 
 def clean_old_files(except_file: str):
     """
-    Remove all CSV files except the specified one.
+    Remove all backup files except the specified one.
     
     Args:
         except_file: Full path of the file to keep
     """
     try:
         data_dir = './data'
-        csv_files = glob.glob(os.path.join(data_dir, 'aoc_rankings_*.csv'))
-        
+        keep = os.path.basename(except_file)
+
         deleted_count = 0
-        for file in csv_files:
-            if file != except_file:
+        with os.scandir(data_dir) as it:
+            for entry in it:
+                name = entry.name
+                if name == keep or not _is_backup_file(name):
+                    continue
                 try:
-                    os.remove(file)
+                    os.unlink(entry.path)
                     deleted_count += 1
-                    logger.info(f"Deleted old file: {file}")
                 except Exception as e:
-                    logger.error(f"Error deleting {file}: {str(e)}")
-        
+                    logger.error(f"Error deleting {entry.path}: {str(e)}")
+
         if deleted_count > 0:
-            logger.info(f"Cleaned up {deleted_count} old CSV files")
+            logger.info("Cleaned up %d old backup files", deleted_count)
             
     except Exception as e:
         logger.error(f"Error during cleanup: {str(e)}")
 
 def get_latest_csv() -> Tuple[str, Optional[datetime]]:
     """
-    Get the most recent CSV file from the data directory.
+    Get the most recent backup file (Parquet or legacy CSV) from the data directory.
     Returns (filepath, datetime) or ('', None) if no files found.
     """
     try:
         data_dir = './data'
-        csv_files = glob.glob(os.path.join(data_dir, 'aoc_rankings_*.csv'))
-        
-        if not csv_files:
-            logger.warning("No CSV files found in data directory")
+        with os.scandir(data_dir) as it:
+            backup_files = [entry.name for entry in it if _is_backup_file(entry.name)]
+
+        if not backup_files:
+            logger.warning("No backup files found in data directory")
             return '', None
-            
-        # Get the latest file based on filename timestamp
-        latest_file = max(csv_files)
-        
-        # Extract timestamp from filename
-        timestamp_str = os.path.basename(latest_file).split('_')[1].split('.')[0]
-        timestamp = datetime.strptime(timestamp_str, '%Y%m%d%H%M%S')
-        
+
+        # Fixed-width timestamps sort chronologically, so the max name is the latest
+        latest_name = max(backup_files)
+        latest_file = os.path.join(data_dir, latest_name)
+
+        # Extract timestamp from filename (aoc_rankings_YYYYMMDD_HHMMSS.<ext>)
+        timestamp_str = os.path.splitext(latest_name)[0][len(BACKUP_PREFIX):]
+        timestamp = datetime.strptime(timestamp_str, '%Y%m%d_%H%M%S')
+
         logger.info(f"Found latest backup file: {latest_file} from {timestamp}")
         return latest_file, timestamp
         
     except Exception as e:
-        logger.error(f"Error finding latest CSV: {str(e)}")
+        logger.error(f"Error finding latest backup: {str(e)}")
         return '', None
 
+@st.cache_data(max_entries=1, show_spinner=False)
+def _read_backup(filepath: str, mtime: float) -> pd.DataFrame:
+    """Parse a backup file; mtime is part of the cache key so replaced files are re-read."""
+    if filepath.endswith('.parquet'):
+        return pd.read_parquet(filepath)
+    return pd.read_csv(filepath)
+
 def load_backup_data() -> Optional[pd.DataFrame]:
-    """Load data from the most recent CSV file."""
+    """Load data from the most recent backup file."""
     filepath, timestamp = get_latest_csv()
     if not filepath:
         return None
-        
+
     try:
         logger.info(f"Loading backup data from {filepath}")
-        df = pd.read_csv(filepath)
+        df = _read_backup(filepath, os.path.getmtime(filepath))
         logger.info(f"Successfully loaded backup with {len(df)} records")
         return df
     except Exception as e:
         logger.error(f"Error loading backup data: {str(e)}")
         return None
 
-def load_data():
-    """Load and cache data from scraper, falling back to backup CSV if scraping fails"""
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def _load():
-        # Temporarily redirect stdout to capture scraper output
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
+def _prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort by points, downcast dtypes and cache the day column list for downstream consumers."""
+    # Scraped data and backups arrive already sorted; only reorder when needed
+    if not df['points'].is_monotonic_decreasing:
+        df = df.take(np.argsort(-df['points'].to_numpy(), kind='stable'))
+    df = df.reset_index(drop=True)
+    day_columns = [col for col in df.columns if col.startswith('day_')]
+
+    # Same numeric dtypes as the scraper, so fresh scrapes and backups share one schema
+    dtypes = {col: dtype for col, dtype in DTYPES.items() if col in df.columns}
+    dtypes['campus'] = 'category'
+    # Arrow-backed strings pickle far smaller than object arrays on st.cache_data hits
+    dtypes['login'] = 'string[pyarrow]'
+    df = df.astype(dtypes)
+
+    df.attrs['day_columns'] = day_columns
+    return df
+
+@st.cache_resource
+def _get_scraper() -> AOCScraper:
+    """Keep one scraper per server so its HTTP session and ETag validators survive reloads"""
+    return AOCScraper(quiet=True)
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def _load_data():
+    """Scrape fresh data (saving a backup), falling back to the latest backup if scraping fails"""
+    try:
+        logger.info("Starting data load")
+        scraper = _get_scraper()
+        df = scraper.scrape_data()
         
-        try:
-            logger.info("Starting data load")
-            scraper = AOCScraper()
-            df = scraper.scrape_data()
-            
-            if df.empty:
-                logger.warning("Scraping failed, attempting to load backup data")
-                df = load_backup_data()
-                if df is not None:
-                    logger.info("Successfully loaded backup data")
-                    st.warning("Could not fetch new data. Showing latest saved data.")
-                else:
-                    logger.error("Both scraping and backup loading failed")
-                    st.error("Could not fetch new data or load backup.")
-            else:
-                # Save the fresh data
-                filepath = scraper.save_data(df)
-                if filepath:
-                    logger.info(f"Fresh data saved to {filepath}")
-                    # Clean up old files after successful save
-                    clean_old_files(filepath)
-            
-            return df.sort_values('points', ascending=False).reset_index(drop=True) if df is not None else pd.DataFrame()
-            
-        except Exception as e:
-            logger.error(f"Error in data loading: {str(e)}")
-            # Try to load backup data in case of error
+        if df.empty:
+            logger.warning("Scraping failed, attempting to load backup data")
             df = load_backup_data()
             if df is not None:
-                logger.info("Successfully loaded backup data after error")
+                logger.info("Successfully loaded backup data")
                 st.warning("Could not fetch new data. Showing latest saved data.")
-                return df.sort_values('points', ascending=False).reset_index(drop=True)
-            return pd.DataFrame()
-            
-        finally:
-            # Always restore stdout
-            sys.stdout = old_stdout
-    
-    return _load()
+            else:
+                logger.error("Both scraping and backup loading failed")
+                st.error("Could not fetch new data or load backup.")
+        elif scraper.not_modified:
+            logger.info("Rankings unchanged since last scrape, keeping existing backup")
+        else:
+            # Save the fresh data
+            filepath = scraper.save_data(df)
+            if filepath:
+                logger.info(f"Fresh data saved to {filepath}")
+                # Clean up old files after successful save
+                clean_old_files(filepath)
+        
+        return _prepare_dataframe(df) if df is not None else pd.DataFrame()
+        
+    except Exception as e:
+        logger.error(f"Error in data loading: {str(e)}")
+        # Try to load backup data in case of error
+        df = load_backup_data()
+        if df is not None:
+            logger.info("Successfully loaded backup data after error")
+            st.warning("Could not fetch new data. Showing latest saved data.")
+            return _prepare_dataframe(df)
+        return pd.DataFrame()
+
+def load_data():
+    """Load and cache data from scraper, falling back to the latest backup if scraping fails"""
+    return _load_data()
+
+def refresh_data():
+    """Drop the cached rankings so the next load_data call scrapes again"""
+    _load_data.clear()
 
 def get_current_aoc_day(df):
     """Get current day based on available day columns"""
-    return len([col for col in df.columns if col.startswith('day_')])
+    return len(get_day_columns(df))
 
 def create_metrics_dataframe(df, is_global=True):
     """Create a formatted dataframe for metrics"""
     current_day = get_current_aoc_day(df)
     max_possible_stars = current_day * 2
 
+    # No day columns yet (before day 1 or no data): there is nothing to rate
+    if current_day == 0:
+        if not is_global:
+            return pd.DataFrame()
+        return pd.DataFrame({'Section': ['🌍 Global'], 'Students': [len(df)], 'Success Rate': ['n/a']})
+
     if is_global:
         total_users = len(df)
         active_users = len(df[df['points'] > 0])
         total_stars = df['total_stars'].sum()
         
         participation_rate = (active_users / total_users * 100) if total_users > 0 else 0
-        total_success_rate = (total_stars / (total_users * max_possible_stars)) * 100
+        # An empty filter result gives 0/0; show it as nan without a RuntimeWarning
+        with np.errstate(divide='ignore', invalid='ignore'):
+            total_success_rate = (total_stars / (total_users * max_possible_stars)) * 100
         active_success_rate = (total_stars / (active_users * max_possible_stars)) * 100 if active_users > 0 else 0
         
         data = [{
@@ -164,28 +203,33 @@ def create_metrics_dataframe(df, is_global=True):
             'Success Rate (Total / Active)': f"{total_success_rate:.1f}% / {active_success_rate:.1f}%"
         }]
     else:
-        data = []
-        for campus in sorted(df['campus'].unique()):
-            campus_data = df[df['campus'] == campus]
-            
-            total_users = len(campus_data)
-            active_users = len(campus_data[campus_data['points'] > 0])
-            total_stars = campus_data['total_stars'].sum()
-            
-            participation_rate = (active_users / total_users * 100) if total_users > 0 else 0
-            total_success_rate = (total_stars / (total_users * max_possible_stars)) * 100
-            active_success_rate = (total_stars / (active_users * max_possible_stars)) * 100 if active_users > 0 else 0
-            
-            colored_campus = f"<span style='color: {CAMPUS_COLORS[campus]}'>🏛️ {campus}</span>"
-            
-            data.append({
-                'Section': colored_campus,
-                'Students (Total / Active)': f"{total_users} / {active_users}",
-                'Participation': f"{participation_rate:.1f}%",
-                'Points (Avg / Max)': f"{campus_data['points'].mean():.1f} / {campus_data['points'].max():.1f}",
-                'Streak (Avg / Max)': f"{campus_data['streak'].mean():.1f} / {campus_data['streak'].max()}",
-                'Stars (Gold / Silver)': f"{int(campus_data['gold_stars'].sum())} / {int(campus_data['silver_stars'].sum())}",
-                'Success Rate (Total / Active)': f"{total_success_rate:.1f}% / {active_success_rate:.1f}%"
-            })
+        # All per-campus aggregates in a single groupby pass
+        g = df.assign(active=df['points'] > 0).groupby('campus', sort=True, observed=True).agg(
+            students=('login', 'size'),
+            active=('active', 'sum'),
+            pts_mean=('points', 'mean'),
+            pts_max=('points', 'max'),
+            streak_mean=('streak', 'mean'),
+            streak_max=('streak', 'max'),
+            gold=('gold_stars', 'sum'),
+            silver=('silver_stars', 'sum'),
+            total=('total_stars', 'sum')
+        )
+
+        participation_rate = g['active'] / g['students'] * 100
+        total_success_rate = g['total'] / (g['students'] * max_possible_stars) * 100
+        active_success_rate = (g['total'] / (g['active'] * max_possible_stars) * 100).where(g['active'] > 0, 0)
+
+        data = {
+            'Section': [f"<span style='color: {CAMPUS_COLORS[campus]}'>🏛️ {campus}</span>" for campus in g.index],
+            'Students (Total / Active)': [f"{t} / {a}" for t, a in zip(g['students'], g['active'])],
+            'Participation': [f"{p:.1f}%" for p in participation_rate],
+            'Points (Avg / Max)': [f"{m:.1f} / {x:.1f}" for m, x in zip(g['pts_mean'], g['pts_max'])],
+            'Streak (Avg / Max)': [f"{m:.1f} / {x}" for m, x in zip(g['streak_mean'], g['streak_max'])],
+            'Stars (Gold / Silver)': [f"{int(gs)} / {int(ss)}" for gs, ss in zip(g['gold'], g['silver'])],
+            'Success Rate (Total / Active)': [
+                f"{t:.1f}% / {a:.1f}%" for t, a in zip(total_success_rate, active_success_rate)
+            ]
+        }
 
     return pd.DataFrame(data)
\ No newline at end of file
@@ -4,43 +4,35 @@ import numpy as np
 from datetime import datetime
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-
-# Define campus colors
-CAMPUS_COLORS = {
-    'UDZ': '#00FF00',  # Green
-    'BCN': '#FFD700',  # Yellow
-    'MAL': '#00FFFF',  # Cyan
-    'MAD': '#FF00FF'   # Magenta
-}
+from .app_utils import CAMPUS_COLORS
 
 def calculate_daily_success_rate(df):
     """
     Calculate daily success rate for each campus based on total campus users
     Success rate = (total stars obtained in day) / (possible stars from total campus users) * 100
     """
-    df = df.copy()
     current_day = datetime.now().day
     
     daily_stats = {}
     
     for campus in df['campus'].unique():
-        campus_df = df[df['campus'] == campus].copy()
-        total_campus_users = len(campus_df)
+        campus_mask = (df['campus'] == campus).to_numpy()
+        total_campus_users = int(campus_mask.sum())
         days_data = []
         
         for day in range(1, current_day + 1):
             day_col = f'day_{day}'
             
             # Get users with stars for this day
-            day_users = campus_df[campus_df[day_col] > 0]
-            active_users = len(day_users)
+            day_values = df.loc[campus_mask, day_col].to_numpy()
+            active_users = int((day_values > 0).sum())
             
             if total_campus_users == 0:
                 continue
             
             # Count stars properly - distinguishing between 1 and 2 stars
-            one_star = len(day_users[day_users[day_col] == 1])
-            two_stars = len(day_users[day_users[day_col] == 2])
+            one_star = int((day_values == 1).sum())
+            two_stars = int((day_values == 2).sum())
             total_stars = one_star + (two_stars * 2)
             possible_stars = total_campus_users * 2  # Each user can get up to 2 stars
             
@@ -132,12 +124,13 @@ def plot_predictions(filtered_df):
         return go.Figure()
     
     fig = go.Figure()
+    traces = []
     
     for campus, pred in predictions.items():
         actual_data = pred['daily_stats']
         
         # Add actual success rate line
-        fig.add_trace(go.Scatter(
+        traces.append(go.Scatter(
             name=f'{campus}',
             x=actual_data['day'],
             y=actual_data['success_rate'],
@@ -164,7 +157,7 @@ def plot_predictions(filtered_df):
         ))
         
         # Add projected rates
-        fig.add_trace(go.Scatter(
+        traces.append(go.Scatter(
             name='',
             x=pred['projected_days'],
             y=pred['projected_rates'],
@@ -174,6 +167,9 @@ def plot_predictions(filtered_df):
             showlegend=False
         ))
 
+    # Validate and append all campus traces in one pass
+    fig.add_traces(traces)
+
     fig.update_layout(
         title='Daily Success Rate by Campus',
         xaxis_title='December Day',
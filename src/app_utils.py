@@ -1,7 +1,24 @@
 import warnings
 
+# Define campus color mapping
+CAMPUS_COLORS = {
+    'UDZ': '#00FF00',  # Green
+    'BCN': '#FFD700',  # Yellow
+    'MAL': '#00FFFF',  # Cyan
+    'MAD': '#FF00FF'   # Magenta
+}
+
+
 def suppress_plotly_warnings():
     warnings.filterwarnings('ignore', category=FutureWarning, 
                           message='The default of observed=False is deprecated')
     warnings.filterwarnings('ignore', category=FutureWarning, 
-                          message='When grouping with a length-1 list-like')
\ No newline at end of file
+                          message='When grouping with a length-1 list-like')
+
+
+def get_day_columns(df):
+    """Return the day_* columns, using the list cached in df.attrs by load_data when present"""
+    day_columns = df.attrs.get('day_columns')
+    if day_columns is None:
+        day_columns = [col for col in df.columns if col.startswith('day_')]
+    return day_columns
@@ -2,16 +2,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-from scipy import stats
-from plotly.subplots import make_subplots
+from .app_utils import CAMPUS_COLORS, get_day_columns
 
-# Define campus color mapping
-CAMPUS_COLORS = {
-    'UDZ': '#00FF00',  # Green
-    'BCN': '#FFD700',  # Yellow
-    'MAL': '#00FFFF',  # Cyan
-    'MAD': '#FF00FF'   # Magenta
-}
 
 MILESTONE_POINTS = {
     'Bronze': 25,
@@ -80,13 +72,11 @@ def apply_common_style(fig):
 
 def plot_stars_distribution(df):
     """Plot distribution of gold and silver stars"""
-    melted_df = pd.melt(
-        df,
-        value_vars=['gold_stars', 'silver_stars'],
-        var_name='star_type',
-        value_name='count'
-    )
-    melted_df['star_type'] = pd.Categorical(melted_df['star_type'])
+    star_types = ['gold_stars', 'silver_stars']
+    melted_df = pd.DataFrame({
+        'star_type': pd.Categorical(np.repeat(star_types, len(df)), categories=star_types),
+        'count': np.concatenate([df['gold_stars'].to_numpy(), df['silver_stars'].to_numpy()])
+    })
     
     fig = px.box(
         melted_df,
@@ -110,32 +100,20 @@ def plot_stars_distribution(df):
 
 def plot_star_totals_by_campus(df):
     """Create a line chart that shows the total number of stars per day for each campus and total."""
-    current_day = len([col for col in df.columns if col.startswith('day_')])
-    day_columns = [f'day_{i}' for i in range(1, current_day + 1)]
-    
-    stars_data = []
-    
-    for campus in df['campus'].unique():
-        campus_mask = df['campus'] == campus
-        for day in day_columns:
-            day_num = int(day.split('_')[1])
-            total_stars = df[campus_mask][day].sum()
-            stars_data.append({
-                'Day': day_num,
-                'Stars': total_stars,
-                'Campus': campus
-            })
-    
-    for day in day_columns:
-        day_num = int(day.split('_')[1])
-        total_stars = df[day].sum()
-        stars_data.append({
-            'Day': day_num,
-            'Stars': total_stars,
-            'Campus': 'ALL'
-        })
-    
-    stars_df = pd.DataFrame(stars_data)
+    day_columns = get_day_columns(df)
+
+    # Per-campus daily sums in one groupby pass, plus the overall total as 'ALL'
+    campus_totals = df[day_columns].groupby(df['campus'], sort=False, observed=True).sum()
+    campus_totals.index = campus_totals.index.astype(str)
+    campus_totals.loc['ALL'] = df[day_columns].sum()
+
+    stars_df = (
+        campus_totals
+        .rename_axis('Campus')
+        .reset_index()
+        .melt(id_vars='Campus', var_name='day', value_name='Stars')
+    )
+    stars_df['Day'] = stars_df['day'].str.slice(4).astype(int)
     
     colors = CAMPUS_COLORS.copy()
     colors['ALL'] = '#FFFFFF'
@@ -163,23 +141,20 @@ def plot_star_totals_by_campus(df):
 
 def plot_success_rate(df):
     """Plot success rate over time by campus"""
-    current_day = len([col for col in df.columns if col.startswith('day_')])
-    day_columns = [f'day_{i}' for i in range(1, current_day + 1)]
-    success_data = []
-    
-    for campus in df['campus'].unique():
-        campus_mask = df['campus'] == campus
-        for day in day_columns:
-            day_num = int(day.split('_')[1])
-            success = (df[campus_mask][day] > 0).sum() / campus_mask.sum() * 100
-            success_data.append({
-                'Day': day_num,
-                'Rate': success,
-                'Campus': campus
-            })
-    
-    success_df = pd.DataFrame(success_data)
-    
+    day_columns = get_day_columns(df)
+
+    # Share of students with at least one star, per campus and day
+    success_df = (
+        (df[day_columns] > 0)
+        .groupby(df['campus'], sort=False, observed=True)
+        .mean()
+        .mul(100)
+        .reset_index()
+        .melt(id_vars='campus', var_name='day', value_name='Rate')
+        .rename(columns={'campus': 'Campus'})
+    )
+    success_df['Day'] = success_df['day'].str.slice(4).astype(int)
+
     fig = px.line(
         success_df,
         x='Day',
@@ -195,9 +170,6 @@ def plot_success_rate(df):
 
 def plot_points_vs_days(df):
     """Create scatter plot of points vs completed days"""
-    df = df.copy()
-    df['campus'] = pd.Categorical(df['campus'])
-    
     fig = px.scatter(
         df,
         x="completed_days",
@@ -206,7 +178,8 @@ def plot_points_vs_days(df):
         size="total_stars",
         hover_data=["login"],
         title="Points vs Days Completed",
-        color_discrete_map=CAMPUS_COLORS
+        color_discrete_map=CAMPUS_COLORS,
+        render_mode='webgl'
     )
     
     return apply_common_style(fig)
@@ -214,27 +187,17 @@ def plot_points_vs_days(df):
 
 def plot_campus_progress(df):
     """Create a clean trend visualization focusing on key metrics"""
-    # Calculate weekly averages to reduce noise
-    current_day = len([col for col in df.columns if col.startswith('day_')])
-    days = list(range(1, current_day + 1))
-    
-    trend_data = []
-    
-    for campus in df['campus'].unique():
-        campus_data = df[df['campus'] == campus]
-        
-        # Calculate average points for each day
-        for day in days:
-            day_col = f'day_{day}'
-            avg_points = campus_data[day_col].mean()
-            
-            trend_data.append({
-                'Campus': campus,
-                'Day': day,
-                'Average_Points': avg_points
-            })
-    
-    trend_df = pd.DataFrame(trend_data)
+    day_columns = get_day_columns(df)
+
+    # Average stars per student for each campus and day, in one groupby pass
+    trend_df = (
+        df.groupby('campus', sort=False, observed=True)[day_columns]
+        .mean()
+        .reset_index()
+        .melt(id_vars='campus', var_name='day', value_name='Average_Points')
+        .rename(columns={'campus': 'Campus'})
+    )
+    trend_df['Day'] = trend_df['day'].str.slice(4).astype(int)
     
     # Create the plot
     fig = px.line(
@@ -281,9 +244,6 @@ def plot_campus_progress(df):
 
 def plot_points_distribution(df):
     """Create box plot of points distribution by campus"""
-    df = df.copy()
-    df['campus'] = pd.Categorical(df['campus'])
-    
     fig = px.box(
         df,
         x="campus",
@@ -296,12 +256,13 @@ def plot_points_distribution(df):
     
     fig = apply_common_style(fig)
     
+    median_points = df['points'].median()
     fig.add_hline(
-        y=df['points'].median(),
+        y=median_points,
         line_dash="dash",
         line_color="white",
         annotation=dict(
-            text=f"Global Median: {df['points'].median():.1f}",
+            text=f"Global Median: {median_points:.1f}",
             font=dict(color="white")
         )
     )
@@ -418,7 +379,7 @@ def plot_team_race(df):
     Create a racing bar chart showing predicted campus rankings
     """
     # Calculate campus rates and projections
-    campus_stats = df.groupby('campus').agg({
+    campus_stats = df.groupby('campus', observed=True).agg({
         'points': 'max',
         'completed_days': 'max'
     }).reset_index()
@@ -1,10 +1,15 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
-from bs4 import BeautifulSoup
-from typing import Optional, Dict, List
+import numpy as np
+from selectolax.lexbor import LexborHTMLParser
+from typing import Optional, Mapping, Tuple
+from types import MappingProxyType
 import traceback
 from datetime import datetime
 import os
+import re
 import logging
 
 # Configure logging
@@ -15,125 +20,220 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+NUM_DAYS = 25
+DAY_COLUMNS = [f'day_{i}' for i in range(1, NUM_DAYS + 1)]
+
+# Byte range of the ranking table, so the parser skips the page chrome around it
+_TABLE_RE = re.compile(rb'<table\b[^>]*\bid=["\']?rankingTable\b.*?</table>', re.S | re.I)
+
+# Span classes marking a gold and a silver star in a day cell
+_GOLD = 'star1'
+_SILVER = 'star0'
+_STAR_CLASSES = frozenset((_GOLD, _SILVER))
+
+# Leading fields of the per-row tuples returned by AOCScraper._process_row,
+# which end with the packed gold and silver day counts and the number of day cells
+META_COLUMNS = ['login', 'campus', 'streak', 'points']
+
+# Bit offset of each day in a packed count field (2 bits per day, 50 bits in total)
+_DAY_SHIFTS = np.arange(NUM_DAYS, dtype=np.uint64) * np.uint64(2)
+
+# Target dtypes of the numeric columns, shared with the dashboard loader. Day values
+# are 0-2 and totals stay well below 2**15; points stays float64 for exact display/filtering
+DTYPES = {
+    'streak': 'int16',
+    'points': 'float64',
+    'completed_days': 'int16',
+    'gold_stars': 'int16',
+    'silver_stars': 'int16',
+    'total_stars': 'int16',
+    **{col: 'int8' for col in DAY_COLUMNS}
+}
+
+# Read-only so the shared mapping can be handed out without copying
+_COLUMN_DESCRIPTIONS = MappingProxyType({
+    'login': 'User login name',
+    'campus': 'Campus name',
+    'streak': 'Current streak of consecutive days completed',
+    'points': 'Total points earned',
+    'completed_days': 'Highest day number with at least one star',
+    'gold_stars': 'Total number of gold stars',
+    'silver_stars': 'Total number of silver stars',
+    'total_stars': 'Total number of stars (gold + silver, max 2 per day)',
+    **{f'day_{i}': f'Day {i} total stars (0-2, can be gold or silver)' 
+       for i in range(1, NUM_DAYS + 1)}
+})
+
+def _tally_stars(stars):
+    """Reduce per-day (gold, silver) counts of shape (rows, days, 2) to the star columns.
+
+    Returns the per-day totals (capped at 2) and the per-row gold, silver and
+    completed-day (highest day with any star) counts.
+    """
+    counts = stars.sum(axis=2, dtype=np.int16)
+    gold = stars[:, :, 0].sum(axis=1, dtype=np.int16)
+    silver = stars[:, :, 1].sum(axis=1, dtype=np.int16)
+    # Highest day with any star: first non-zero day counting from the right
+    has_stars = counts > 0
+    completed = np.where(has_stars.any(axis=1), stars.shape[1] - has_stars[:, ::-1].argmax(axis=1), 0)
+    return np.minimum(counts, 2).astype(np.uint8), gold, silver, completed.astype(np.int16)
+
+def _unpack_stars(packed):
+    """Expand packed (gold, silver) day counts of shape (rows, 2) to (rows, days, 2) uint8."""
+    return ((packed[:, None, :] >> _DAY_SHIFTS[None, :, None]) & np.uint64(3)).astype(np.uint8)
+
 class AOCScraper:
-    def __init__(self):
+    def __init__(self, quiet: bool = False):
+        # Progress messages drop to DEBUG when quiet; errors are always logged
+        self.log_level = logging.DEBUG if quiet else logging.INFO
         self.url = "https://aoc.42barcelona.com/ranking/es"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
+        # Reuse one pooled keep-alive connection across scrapes and retry transient errors
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retries))
+        # Validators from the last full response, sent back as a conditional GET
+        self._etag = None
+        self._last_modified = None
+        self._cached_df = None
+        # True when the last scrape_data call was answered with 304 Not Modified
+        self.not_modified = False
         self.data_dir = './data'
         os.makedirs(self.data_dir, exist_ok=True)
-        logger.info(f"Data directory initialized: {self.data_dir}")
+        logger.log(self.log_level, "Data directory initialized: %s", self.data_dir)
 
-    def _process_row(self, row) -> Optional[Dict]:
-        """Process a single row of data."""
-        try:
-            cells = row.find_all('td')
-            if len(cells) < 5:
-                return None
-
-            # Basic data
-            data = {
-                'login': cells[0].text.strip(),
-                'campus': cells[1].text.strip(),
-                'streak': int(cells[2].text.strip()),
-                'points': float(cells[3].text.strip()),
-            }
-
-            # Initialize counters
-            completed_days = 0
-            gold_stars = 0
-            silver_stars = 0
-
-            # Process stars day by day
-            star_cells = cells[4:]
-            for i, cell in enumerate(star_cells):
-                day_num = i + 1
-                
-                # Get all star spans
-                spans = cell.find_all('span')
-                
-                # Count gold and silver stars separately
-                day_gold = len(cell.find_all('span', class_='star1'))  # Gold
-                day_silver = len(cell.find_all('span', class_='star0'))  # Silver
-                
-                # Limit to maximum 2 stars per type
-                day_gold = min(day_gold, 2)
-                day_silver = min(day_silver, 2)
-                
-                # Update total counters
-                gold_stars += day_gold
-                silver_stars += day_silver
-                
-                # Update completed days if any stars were earned
-                if (day_gold + day_silver > 0) and day_num > completed_days:
-                    completed_days = day_num
-                
-                # Store total stars for the day (max 2)
-                data[f'day_{day_num}'] = min(day_gold + day_silver, 2)
-
-            # Add star totals
-            data['completed_days'] = completed_days
-            data['gold_stars'] = gold_stars
-            data['silver_stars'] = silver_stars
-            data['total_stars'] = gold_stars + silver_stars
-
-            return data
-            
-        except Exception as e:
-            logger.error(f"Error processing row: {str(e)}")
+    def _process_row(self, row) -> Optional[Tuple]:
+        """Process a single row of data.
+
+        Returns the (login, campus, streak, points, gold_bits, silver_bits, n_days)
+        tuple, where the bit fields pack each day's count (0-2) into 2 bits and
+        n_days is the number of day cells in the row, or None for rows that are
+        not ranking entries. Malformed values raise to the caller.
+        """
+        # Walk the row's children directly instead of running a CSS query per row
+        cells = [node for node in row.iter() if node.tag == 'td']
+        if len(cells) < 5:
             return None
 
+        row_data = (
+            cells[0].text().strip(),
+            cells[1].text().strip(),
+            # int()/float() ignore surrounding whitespace, so the numeric cells skip the strip
+            int(cells[2].text()),
+            float(cells[3].text()),
+        )
+
+        # Process stars day by day
+        day_cells = cells[4:4 + NUM_DAYS]
+        gold_bits = silver_bits = 0
+        for i, cell in enumerate(day_cells):
+            # Count gold (star1) and silver (star0) stars in a single pass
+            # over the spans, capped at 2 per type
+            day_gold = day_silver = 0
+            for span in cell.traverse():
+                if span.tag != 'span':
+                    continue
+                classes = _STAR_CLASSES.intersection((span.attributes.get('class') or '').split())
+                if not classes:
+                    continue
+                if _GOLD in classes and day_gold < 2:
+                    day_gold += 1
+                if _SILVER in classes and day_silver < 2:
+                    day_silver += 1
+                if day_gold == 2 and day_silver == 2:
+                    break
+            
+            gold_bits |= day_gold << (2 * i)
+            silver_bits |= day_silver << (2 * i)
+
+        return row_data + (gold_bits, silver_bits, len(day_cells))
+
     def _convert_numeric_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Convert numeric columns to their proper type."""
-        numeric_cols = ['streak', 'points', 'completed_days', 
-                       'gold_stars', 'silver_stars', 'total_stars']
-        day_cols = [col for col in df.columns if col.startswith('day_')]
-        numeric_cols.extend(day_cols)
-        
-        for col in numeric_cols:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-                # Keep points as float, convert others to int
-                if col != 'points':
-                    df[col] = df[col].astype(int)
-        
-        return df
+        """Convert numeric columns to their proper type in a single astype pass."""
+        return df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
 
     def scrape_data(self) -> pd.DataFrame:
         """Scrape AOC rankings data."""
+        self.not_modified = False
         try:
-            logger.info(f"Fetching data from {self.url}")
-            response = requests.get(self.url, headers=self.headers, timeout=10)
+            logger.log(self.log_level, "Fetching data from %s", self.url)
+            headers = {}
+            if self._cached_df is not None:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
+
+            response = self.session.get(self.url, headers=headers, timeout=10)
             response.raise_for_status()
+            logger.debug("Fetched %s in %s", self.url, response.elapsed)
+
+            if response.status_code == 304 and self._cached_df is not None:
+                logger.log(self.log_level, "Rankings not modified, reusing parsed data")
+                self.not_modified = True
+                return self._cached_df.copy()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Hand the raw UTF-8 bytes to lexbor; skips requests' charset sniffing and str decode.
+            # Only the table fragment is parsed when it can be located, else the whole page.
+            content = response.content
+            match = _TABLE_RE.search(content)
+            tree = LexborHTMLParser(match.group(0) if match else content)
             
-            table = soup.find('table', id='rankingTable')
+            table = tree.css_first('table#rankingTable')
             if not table:
                 logger.error("Ranking table not found")
                 return pd.DataFrame()
 
-            tbody = table.find('tbody')
+            tbody = table.css_first('tbody')
             if not tbody:
                 logger.error("Table body not found")
                 return pd.DataFrame()
 
-            data = []
-            logger.info("Processing table rows...")
-            for row in tbody.find_all('tr'):
-                row_data = self._process_row(row)
-                if row_data:
-                    data.append(row_data)
+            rows = [node for node in tbody.iter() if node.tag == 'tr']
+            meta = []
+            logger.log(self.log_level, "Processing table rows...")
+            # One handler for the whole loop: a malformed value means the page format changed
+            try:
+                for index, row in enumerate(rows):
+                    row_data = self._process_row(row)
+                    if row_data:
+                        meta.append(row_data)
+            except Exception as e:
+                logger.error(f"Error processing row {index}: {str(e)}")
+                return pd.DataFrame()
 
-            if not data:
+            if not meta:
                 logger.error("No data found in table")
                 return pd.DataFrame()
 
-            logger.info("Converting data to DataFrame...")
-            df = pd.DataFrame(data)
+            logger.log(self.log_level, "Converting data to DataFrame...")
+            # Order rows by points (descending, ties keep page order) before building the frame
+            points = np.fromiter((row_data[3] for row_data in meta), dtype=np.float64, count=len(meta))
+            order = np.argsort(-points, kind='stable')
+            ordered = [meta[i] for i in order]
+            # Only the days published so far get columns; the widest row tells how many
+            n_days = max(row_data[6] for row_data in meta)
+            # Day counts stay packed through the parse; expand them once, here
+            packed = np.array([row_data[4:6] for row_data in ordered], dtype=np.uint64)
+            days, gold_stars, silver_stars, completed_days = _tally_stars(_unpack_stars(packed)[:, :n_days])
+            meta_df = pd.DataFrame([row_data[:4] for row_data in ordered], columns=META_COLUMNS)
+            derived = pd.DataFrame({
+                'completed_days': completed_days,
+                'gold_stars': gold_stars,
+                'silver_stars': silver_stars,
+                'total_stars': gold_stars + silver_stars,
+            })
+            # Columns come out as metadata, the day_* block, then the summary columns
+            df = pd.concat([meta_df, pd.DataFrame(days, columns=DAY_COLUMNS[:n_days]), derived], axis=1)
             df = self._convert_numeric_columns(df)
-            return df.sort_values('points', ascending=False).reset_index(drop=True)
+
+            self._etag = response.headers.get('ETag')
+            self._last_modified = response.headers.get('Last-Modified')
+            self._cached_df = df
+            return df.copy()
             
         except Exception as e:
             logger.error(f"Error scraping data: {str(e)}")
@@ -141,21 +241,21 @@ class AOCScraper:
             return pd.DataFrame()
 
     def save_data(self, df: pd.DataFrame) -> str:
-        """Save DataFrame to CSV and return filepath."""
+        """Save DataFrame to Parquet and return filepath."""
         if df.empty:
             logger.error("Cannot save empty DataFrame")
             return ""
             
         try:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f'aoc_rankings_{timestamp}.csv'
+            filename = f'aoc_rankings_{timestamp}.parquet'
             filepath = os.path.join(self.data_dir, filename)
             
-            logger.info(f"Saving to {filepath}")
-            df.to_csv(filepath, index=False)
+            logger.log(self.log_level, "Saving to %s", filepath)
+            df.to_parquet(filepath, index=False, compression='zstd')
             
             if os.path.exists(filepath):
-                logger.info(f"File saved successfully ({os.path.getsize(filepath)} bytes)")
+                logger.log(self.log_level, "File saved successfully (%d bytes)", os.path.getsize(filepath))
                 return filepath
             return ""
             
@@ -163,17 +263,6 @@ class AOCScraper:
             logger.error(f"Error saving file: {str(e)}")
             return ""
 
-    def get_column_descriptions(self) -> Dict[str, str]:
+    def get_column_descriptions(self) -> Mapping[str, str]:
         """Get descriptions for all columns."""
-        return {
-            'login': 'User login name',
-            'campus': 'Campus name',
-            'streak': 'Current streak of consecutive days completed',
-            'points': 'Total points earned',
-            'completed_days': 'Highest day number with at least one star',
-            'gold_stars': 'Total number of gold stars',
-            'silver_stars': 'Total number of silver stars',
-            'total_stars': 'Total number of stars (gold + silver, max 2 per day)',
-            **{f'day_{i}': f'Day {i} total stars (0-2, can be gold or silver)' 
-               for i in range(1, 26)}
-        }
\ No newline at end of file
+        return _COLUMN_DESCRIPTIONS
\ No newline at end of file
@@ -0,0 +1,68 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.app_operations import get_latest_csv, load_backup_data, _prepare_dataframe
+from src.scraper import AOCScraper
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Run from a temporary working directory with an empty ./data folder."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data')
+    return tmp_path / 'data'
+
+def _backup_frame():
+    return pd.DataFrame({
+        'login': ['user_b', 'user_a'],
+        'campus': ['MAD', 'BCN'],
+        'streak': [1, 3],
+        'points': [10.0, 120.5],
+        'day_1': [1, 2],
+        'day_2': [0, 2],
+        'completed_days': [1, 2],
+        'gold_stars': [0, 3],
+        'silver_stars': [1, 1],
+        'total_stars': [1, 4],
+    })
+
+def test_get_latest_csv_returns_newest_backup(data_dir):
+    """Test the newest backup is picked by its filename timestamp, across formats."""
+    for name in ['aoc_rankings_20241201_090000.csv',
+                 'aoc_rankings_20241203_180500.parquet',
+                 'aoc_rankings_20241202_235959.csv',
+                 'notes.csv']:
+        (data_dir / name).write_text('login\n')
+
+    filepath, timestamp = get_latest_csv()
+
+    assert filepath == os.path.join('./data', 'aoc_rankings_20241203_180500.parquet')
+    assert timestamp == datetime(2024, 12, 3, 18, 5, 0)
+
+def test_get_latest_csv_without_backups(data_dir):
+    """Test an empty data directory yields no backup."""
+    assert get_latest_csv() == ('', None)
+
+def test_load_backup_data_reads_legacy_csv(data_dir):
+    """Test a CSV backup written by older versions still loads and prepares."""
+    _backup_frame().to_csv(data_dir / 'aoc_rankings_20241130_120000.csv', index=False)
+
+    df = _prepare_dataframe(load_backup_data())
+
+    assert list(df['login']) == ['user_a', 'user_b']
+    assert list(df['points']) == [120.5, 10.0]
+    assert df.attrs['day_columns'] == ['day_1', 'day_2']
+    assert df.loc[0, 'total_stars'] == 4
+
+def test_save_data_parquet_round_trip(data_dir):
+    """Test save_data writes a Parquet backup that load_backup_data reads back."""
+    original = _backup_frame()
+
+    filepath = AOCScraper().save_data(original)
+
+    assert filepath.endswith('.parquet')
+    assert os.path.basename(filepath).startswith('aoc_rankings_')
+    pd.testing.assert_frame_equal(load_backup_data(), original)
@@ -1,9 +1,11 @@
 import pytest
+import logging
 import requests
 import pandas as pd
 import numpy as np
 from unittest.mock import patch, MagicMock
-from src.scraper import AOCScraper
+from selectolax.lexbor import LexborHTMLParser
+from src.scraper import AOCScraper, _tally_stars, _unpack_stars
 
 def test_create_empty_dataframe():
     """Test creation of empty DataFrame."""
@@ -19,6 +21,12 @@ def test_scraper_initialization():
     assert scraper.url == "https://aoc.42barcelona.com/ranking/es"
     assert isinstance(scraper.headers, dict)
     assert "Mozilla" in scraper.headers["User-Agent"]
+    assert scraper.session.headers["User-Agent"] == scraper.headers["User-Agent"]
+
+def test_scraper_quiet_logs_progress_at_debug():
+    """Test quiet scraper demotes progress messages to DEBUG."""
+    assert AOCScraper().log_level == logging.INFO
+    assert AOCScraper(quiet=True).log_level == logging.DEBUG
 
 def test_process_row_valid():
     """Test processing of valid row."""
@@ -38,23 +46,27 @@ def test_process_row_valid():
     assert result['points'] == "100"
     assert result['days'] == "10"
 
+def _table_row(cells_html):
+    """Parse a single <tr> holding the given cell markup."""
+    return LexborHTMLParser(f'<table><tr>{cells_html}</tr></table>').css_first('tr')
+
 def test_process_row_none():
-    """Test processing None input."""
+    """Test None input is not a row and raises."""
     scraper = AOCScraper()
-    result = scraper._process_row(None)
-    assert result is None
+    with pytest.raises(AttributeError):
+        scraper._process_row(None)
 
 def test_process_row_empty():
-    """Test processing empty list."""
+    """Test processing a row without cells."""
     scraper = AOCScraper()
-    result = scraper._process_row([])
+    result = scraper._process_row(_table_row(''))
     assert result is None
 
 def test_process_row_insufficient_columns():
     """Test processing row with insufficient columns."""
     scraper = AOCScraper()
-    cols = [MagicMock(text="test_user")] * 4  # Only 4 columns
-    result = scraper._process_row(cols)
+    row = _table_row('<td>test_user</td><td>BCN</td><td>5</td><td>100</td>')  # Only 4 columns
+    result = scraper._process_row(row)
     assert result is None
 
 def test_convert_numeric_columns():
@@ -73,7 +85,7 @@ def test_convert_numeric_columns():
     assert result['points'][0] == 100
     assert result['days'][0] == 10
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_network_error(mock_get):
     """Test handling of network errors."""
     mock_get.side_effect = requests.RequestException("Network error")
@@ -82,7 +94,7 @@ def test_scrape_data_network_error(mock_get):
     assert len(df) == 0
     assert list(df.columns) == ['login', 'campus', 'streak', 'points', 'days']
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_success(mock_get):
     """Test successful data scraping."""
     response = MagicMock()
@@ -104,37 +116,37 @@ def test_scrape_data_success(mock_get):
     assert df.iloc[0]['login'] == 'test_user'
     assert df.iloc[0]['points'] == 100
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_invalid_response(mock_get):
     """Test handling of invalid response data."""
     response = MagicMock()
-    response.text = "invalid html"
+    response.content = b"invalid html"
     mock_get.return_value = response
     scraper = AOCScraper()
     df = scraper.scrape_data()
     assert len(df) == 0
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_empty_table(mock_get):
     """Test handling of empty table."""
     response = MagicMock()
-    response.text = "<table></table>"
+    response.content = b"<table></table>"
     mock_get.return_value = response
     scraper = AOCScraper()
     df = scraper.scrape_data()
     assert len(df) == 0
 
 def test_process_row_attribute_error():
-    """Test handling of attribute error in row processing."""
+    """Test input that is not a parsed row propagates the attribute error."""
     scraper = AOCScraper()
     mock_col = MagicMock()
     # Remove the text attribute to trigger AttributeError
     del mock_col.text  
     cols = [mock_col] * 5
-    result = scraper._process_row(cols)
-    assert result is None
+    with pytest.raises(AttributeError):
+        scraper._process_row(cols)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_with_malformed_rows(mock_get):
     """Test scraping with malformed rows that trigger attribute errors."""
     response = MagicMock()
@@ -172,7 +184,7 @@ def test_process_stars():
     assert result['day_2'] == 1  # Silver star
     assert result['day_3'] == 0  # No star
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_scrape_data_with_stars(mock_get):
     """Test scraping with star data."""
     response = MagicMock()
@@ -200,3 +212,130 @@ def test_scrape_data_with_stars(mock_get):
     assert df.iloc[0]['completed_days'] == 2
     assert df.iloc[0]['gold_stars'] == 1
     assert df.iloc[0]['silver_stars'] == 1
+
+
+def test_tally_stars():
+    """Test per-day gold/silver counts reduce to capped day totals and star sums."""
+    stars = np.zeros((2, 25, 2), dtype=np.uint8)
+    stars[0, 0] = [2, 0]
+    stars[0, 2] = [1, 2]
+    stars[1, 24] = [0, 1]
+
+    days, gold, silver, completed = _tally_stars(stars)
+
+    assert days[0, :3].tolist() == [2, 0, 2]
+    assert days[1, 24] == 1
+    assert gold.tolist() == [3, 0]
+    assert silver.tolist() == [2, 1]
+    assert completed.tolist() == [3, 25]
+
+def test_unpack_stars():
+    """Test packed 2-bit day counts expand back to per-day gold/silver counts."""
+    packed = np.array([[2 | 1 << 4, 1 << 48]], dtype=np.uint64)
+
+    stars = _unpack_stars(packed)
+
+    assert stars.shape == (1, 25, 2)
+    assert stars.dtype == np.uint8
+    assert stars[0, 0].tolist() == [2, 0]
+    assert stars[0, 2].tolist() == [1, 0]
+    assert stars[0, 24].tolist() == [0, 1]
+    assert int(stars.sum()) == 4
+
+def _ranking_html(rows, n_days=25):
+    """Build a ranking page: rows are (login, campus, streak, points, {day: [span classes]})."""
+    body = []
+    for login, campus, streak, points, days in rows:
+        cells = [f"<td> {login} </td>", f"<td>{campus}</td>", f"<td>{streak}</td>", f"<td>{points}</td>"]
+        for day in range(1, n_days + 1):
+            spans = ''.join(f'<span class="{cls}">*</span>' for cls in days.get(day, []))
+            cells.append(f"<td>{spans}</td>")
+        body.append(f"<tr>{''.join(cells)}</tr>")
+    return (
+        "<html><body><nav>menu</nav>"
+        '<table class="table" id="rankingTable"><thead><tr><th>Login</th></tr></thead>'
+        f"<tbody>{''.join(body)}</tbody></table></body></html>"
+    )
+
+@patch('requests.Session.get')
+def test_scrape_data_ranking_table(mock_get):
+    """Test star counting and derived columns on a realistic ranking table."""
+    response = MagicMock()
+    response.text = _ranking_html([
+        ('<a>x login</a> <small>(pro)</small>', 'MAD', 0, 10, {5: ['star0']}),
+        ('user_a', 'BCN', 3, 120.5, {1: ['star1', 'star1'], 2: ['star1', 'star0'], 3: ['star0']}),
+    ])
+    response.content = response.text.encode()
+    mock_get.return_value = response
+    scraper = AOCScraper()
+    df = scraper.scrape_data()
+
+    # Nested markup keeps the whitespace between its text nodes, as .text.strip() did
+    assert list(df['login']) == ['user_a', 'x login (pro)']
+    first = df.iloc[0]
+    assert first['campus'] == 'BCN'
+    assert first['streak'] == 3
+    assert first['points'] == 120.5
+    assert [first[f'day_{i}'] for i in range(1, 5)] == [2, 2, 1, 0]
+    assert first['completed_days'] == 3
+    assert first['gold_stars'] == 3
+    assert first['silver_stars'] == 2
+    assert first['total_stars'] == 5
+    second = df.iloc[1]
+    assert second['day_5'] == 1
+    assert second['completed_days'] == 5
+    assert second['total_stars'] == 1
+
+@patch('requests.Session.get')
+def test_scrape_data_partial_event_keeps_published_days(mock_get):
+    """Test a page with fewer than 25 day cells only yields columns for those days."""
+    from src.app_operations import get_current_aoc_day
+
+    response = MagicMock(status_code=200, headers={})
+    response.text = _ranking_html([
+        ('user_a', 'BCN', 3, 10, {1: ['star1', 'star1'], 3: ['star0']}),
+        ('user_b', 'MAD', 1, 5, {}),
+    ], n_days=10)
+    response.content = response.text.encode()
+    mock_get.return_value = response
+
+    df = AOCScraper().scrape_data()
+
+    assert [col for col in df.columns if col.startswith('day_')] == [f'day_{i}' for i in range(1, 11)]
+    assert get_current_aoc_day(df) == 10
+    assert df.iloc[0]['completed_days'] == 3
+    assert df.iloc[0]['total_stars'] == 3
+
+@patch('requests.Session.get')
+def test_scrape_data_malformed_value_reports_row(mock_get, caplog):
+    """Test a non-numeric score aborts the scrape and logs the offending row."""
+    response = MagicMock(status_code=200, headers={})
+    response.content = _ranking_html([
+        ('user_a', 'BCN', 3, 10, {}),
+        ('user_b', 'MAD', 1, 'n/a', {}),
+    ]).encode()
+    mock_get.return_value = response
+
+    df = AOCScraper().scrape_data()
+
+    assert df.empty
+    assert 'Error processing row 1' in caplog.text
+
+@patch('requests.Session.get')
+def test_scrape_data_not_modified_reuses_cached_frame(mock_get):
+    """Test a 304 on a conditional GET returns the previously parsed data."""
+    first = MagicMock(status_code=200, headers={'ETag': '"v1"'})
+    first.text = _ranking_html([('user_a', 'BCN', 1, 10, {1: ['star1']})])
+    first.content = first.text.encode()
+    not_modified = MagicMock(status_code=304, headers={})
+    mock_get.side_effect = [first, not_modified]
+    scraper = AOCScraper()
+
+    df_first = scraper.scrape_data()
+    assert not scraper.not_modified
+    df_second = scraper.scrape_data()
+    assert scraper.not_modified
+
+    assert mock_get.call_args.kwargs['headers'] == {'If-None-Match': '"v1"'}
+    pd.testing.assert_frame_equal(df_first, df_second)
+    assert df_second is not df_first